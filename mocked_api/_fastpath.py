@@ -0,0 +1,40 @@
+"""
+Per-request header helpers for mock_api.
+
+Kept free of FastAPI/Starlette types so the module can be compiled with mypyc
+(see Dockerfile-mockapi). A compiled extension takes precedence on import; this
+file is the fallback when none is built.
+"""
+
+from collections.abc import Iterable, Sequence
+
+# https://www.rfc-editor.org/rfc/rfc2616#section-13.5.1
+HOP_BY_HOP: frozenset[str] = frozenset({
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+    "host",
+    "content-length",
+})
+HOP_BY_HOP_RAW: frozenset[bytes] = frozenset(h.encode("latin-1") for h in HOP_BY_HOP)
+# With a server-side OPENAI_API_KEY the client's authorization is replaced, not forwarded.
+HOP_BY_HOP_RAW_AND_AUTH: frozenset[bytes] = HOP_BY_HOP_RAW | {b"authorization"}
+
+
+def filter_hop_by_hop_headers(headers: dict[str, str]) -> dict[str, str]:
+    return {k: v for k, v in headers.items() if k.lower() not in HOP_BY_HOP}
+
+
+def forwardable_headers(
+    raw_headers: Iterable[Sequence[bytes]],
+    exclude: frozenset[bytes] = HOP_BY_HOP_RAW,
+) -> list[tuple[bytes, bytes]]:
+    # Works on the raw ASGI header list (names are already lowercase bytes), so
+    # there's no dict/str round-trip before handing them to httpx. ASGI only
+    # promises two-item byte sequences, not tuples, so accept any sequence.
+    return [(k, v) for k, v in raw_headers if k not in exclude]
@@ -1,17 +1,28 @@
+import asyncio
 import json
 import os
 import re
 import time
 import secrets
+from collections import OrderedDict
 from pathlib import Path
 from lorem_text import lorem
 
+try:
+    import orjson
+except ImportError:  # optional: faster JSON encoding when installed
+    orjson = None
+
 from fastapi import FastAPI
 from fastapi import Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.responses import Response, StreamingResponse, HTMLResponse, RedirectResponse
 from starlette.responses import FileResponse
+from starlette.background import BackgroundTask
+
+from _fastpath import HOP_BY_HOP_RAW_AND_AUTH, filter_hop_by_hop_headers, forwardable_headers
 
 app = FastAPI()
 
@@ -22,11 +33,172 @@ UPSTREAM_BASE = os.environ.get("UPSTREAM_BASE", "https://api.openai.com").rstrip
 OPENAI_API_KEY = (os.environ.get("OPENAI_API_KEY", "") or os.environ.get("VITE_OPENAI_API_KEY", "")).strip()
 STATIC_DIR = Path(os.environ.get("STATIC_DIR", "/work/dist")).resolve()
 
+
+def _index_static_files() -> dict[str, Path]:
+    # Relative URL path -> file. Only files that resolve inside STATIC_DIR are
+    # listed, so lookups need no per-request path traversal check.
+    if not STATIC_DIR.is_dir():
+        return {}
+    files = {}
+    for p in STATIC_DIR.rglob("*"):
+        resolved = p.resolve()
+        if STATIC_DIR in resolved.parents and resolved.is_file():
+            files[p.relative_to(STATIC_DIR).as_posix()] = resolved
+    return files
+
+
+# Built once at import; rebuild dist/ before (re)starting the server.
+_STATIC_FILES = _index_static_files()
+_INDEX_PATH = _STATIC_FILES.get("index.html")
+# Serve the hashed bundles under dist/assets/ without a session check (off by default).
+PUBLIC_ASSETS = os.environ.get("PUBLIC_ASSETS", "").strip() in ("1", "true", "yes", "on")
+
+# Paths that never consult the session: the mock /v1 API, and optionally the SPA assets.
+# SessionMiddleware (cookie signature check) and AuthMiddleware are skipped for these.
+_SESSIONLESS_PREFIXES = tuple(
+    p for p, on in (("/v1/", MODE != "proxy"), ("/assets/", PUBLIC_ASSETS)) if on
+)
+
 # CORS: by default allow any origin (legacy behavior). If you're using cookies (sessions),
 # set CORS_ALLOW_ORIGINS to a comma-separated list and CORS_ALLOW_CREDENTIALS=1.
 CORS_ALLOW_ORIGINS = [o.strip() for o in os.environ.get("CORS_ALLOW_ORIGINS", "").split(",") if o.strip()]
 CORS_ALLOW_CREDENTIALS = os.environ.get("CORS_ALLOW_CREDENTIALS", "").strip() in ("1", "true", "yes", "on")
 
+# Fixed JSON error bodies, encoded once.
+_UNAUTHORIZED_JSON = b'{"error":"unauthorized"}'
+_NO_PASSKEY_JSON = b'{"error":"APP_PASSKEY is not set"}'
+_TOO_MANY_JSON = b'{"error":"too many attempts, try again later"}'
+_BAD_PASSKEY_JSON = b'{"error":"invalid passkey"}'
+_NO_UPSTREAM_JSON = b'{"error":"MOCK_API_UPSTREAM is not set"}'
+
+# Raw ASGI headers for the replies AuthMiddleware sends without building a Response.
+_UNAUTHORIZED_HEADERS = (
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(_UNAUTHORIZED_JSON)).encode("latin-1")),
+)
+_LOGIN_REDIRECT_HEADERS = (
+    (b"location", b"/login"),
+    (b"content-length", b"0"),
+)
+
+
+class AuthMiddleware:
+    """
+    Pure ASGI passkey guard: rejects unauthenticated requests before route dispatch.
+
+    API routes (/proxy/*, and /v1/* in proxy mode) get a 401; page GETs are
+    redirected to /login. Login/auth routes and the mock API stay public.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("session", {}).get("authed"):
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if path.startswith(_SESSIONLESS_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        if path.startswith("/proxy/") or (MODE == "proxy" and path.startswith("/v1/")):
+            status, headers, body = 401, _UNAUTHORIZED_HEADERS, _UNAUTHORIZED_JSON
+        elif scope["method"] == "GET" and not (
+            path == "/login"
+            or path == "/v1"
+            or path.startswith(("/v1/", "/auth/"))
+        ):
+            status, headers, body = 302, _LOGIN_REDIRECT_HEADERS, b""
+        else:
+            await self.app(scope, receive, send)
+            return
+        # Fresh message dicts and header lists: outer middleware may modify them in place.
+        await send({"type": "http.response.start", "status": status, "headers": list(headers)})
+        await send({"type": "http.response.body", "body": body})
+
+
+class SessionPathsMiddleware:
+    """
+    SessionMiddleware, restricted to paths that actually use the session.
+
+    Requests under _SESSIONLESS_PREFIXES go straight to the inner app, so their
+    cookie isn't signature-checked and no session is attached.
+    """
+
+    def __init__(self, app, **session_kwargs):
+        self.app = app
+        self.session_app = SessionMiddleware(app, **session_kwargs)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(_SESSIONLESS_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        await self.session_app(scope, receive, send)
+
+
+_CORS_ALLOW_ANY_ORIGIN = (b"access-control-allow-origin", b"*")
+_CORS_PREFLIGHT_HEADERS = [
+    _CORS_ALLOW_ANY_ORIGIN,
+    (b"access-control-allow-methods", b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"),
+    (b"access-control-max-age", b"600"),
+]
+
+
+class WildcardCORSMiddleware:
+    """
+    Pure ASGI CORS for the default allow-any-origin, no-credentials setup.
+
+    Preflights are answered directly; every other response gets a fixed
+    `access-control-allow-origin: *`. Requested headers are echoed back because
+    a `*` in access-control-allow-headers doesn't cover Authorization.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS":
+            preflight = False
+            requested_headers = None
+            for k, v in scope["headers"]:
+                if k == b"access-control-request-method":
+                    preflight = True
+                elif k == b"access-control-request-headers":
+                    requested_headers = v
+            if preflight:
+                headers = list(_CORS_PREFLIGHT_HEADERS)
+                if requested_headers:
+                    headers.append((b"access-control-allow-headers", requested_headers))
+                await send({"type": "http.response.start", "status": 204, "headers": headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                # Replace rather than append, in case a proxied upstream set its own.
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() != b"access-control-allow-origin"]
+                headers.append(_CORS_ALLOW_ANY_ORIGIN)
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# Compress SPA assets and JSON. Starlette >= 0.46 leaves text/event-stream
+# uncompressed, so SSE events aren't held back in the compressor.
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=5)
+
+if APP_PASSKEY:
+    # Registered before CORS/sessions so it sits inside them: SessionMiddleware has
+    # already decoded the cookie into scope["session"], and CORS still wraps (and
+    # answers preflights ahead of) the 401s.
+    app.add_middleware(AuthMiddleware)
+
 if CORS_ALLOW_ORIGINS:
     app.add_middleware(
         CORSMiddleware,
@@ -36,18 +208,13 @@ if CORS_ALLOW_ORIGINS:
         allow_headers=["*"],
     )
 else:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
+    app.add_middleware(WildcardCORSMiddleware)
 
 if APP_PASSKEY:
     # Prefer a dedicated secret if provided, else derive from the passkey.
     session_secret = os.environ.get("SESSION_SECRET", "").strip() or APP_PASSKEY
     app.add_middleware(
-        SessionMiddleware,
+        SessionPathsMiddleware,
         secret_key=session_secret,
         same_site="lax",
         https_only=os.environ.get("HTTPS_ONLY", "").strip() in ("1", "true", "yes", "on"),
@@ -55,9 +222,102 @@ if APP_PASSKEY:
 
 MOCK_UPSTREAM_BASE = os.environ.get("MOCK_API_UPSTREAM", "").rstrip("/")
 
-_login_attempts: dict[str, list[float]] = {}
+# Mock directives in the last message: "d<N>" delays N seconds, "l<N>" returns N lines.
+_RE_DELAY = re.compile(r'(?<=d)\d+')
+_RE_LINES = re.compile(r'(?<=l)\d+')
+
+
+def _load_models_body() -> bytes:
+    # The model list never changes at runtime: parse it once and keep the
+    # compact encoding around.
+    try:
+        with open('/work/models_response.json', 'rb') as f:
+            raw = f.read()
+        result = orjson.loads(raw) if orjson else json.loads(raw)
+    except (OSError, ValueError):
+        result = {"object": "list", "data": []}
+    if orjson:
+        return orjson.dumps(result)
+    return json.dumps(result, separators=(",", ":")).encode("utf-8")
+
+
+_MODELS_BODY = _load_models_body()
+
+# Above this many lines, lorem generation runs in a worker thread so it
+# doesn't stall the event loop.
+_LOREM_OFFLOAD_LINES = 100
+
+
+def _lorem_lines(n: int) -> str:
+    return "\n".join([lorem.sentence() for _ in range(n)])
+
+
+async def _lorem_answer(n: int) -> str:
+    if n <= _LOREM_OFFLOAD_LINES:
+        return _lorem_lines(n)
+    return await asyncio.get_running_loop().run_in_executor(None, _lorem_lines, n)
+
+
+@app.on_event("startup")
+async def _open_http_client():
+    # One long-lived client shared by the proxy routes, so upstream connections
+    # (TCP/TLS handshakes, HTTP/2 sessions) are reused across requests.
+    if MODE != "proxy" and not MOCK_UPSTREAM_BASE:
+        return
+    # Import here so the app still runs if proxy isn't used.
+    import httpx
+
+    app.state.http_client = httpx.AsyncClient(
+        follow_redirects=True,
+        timeout=60.0,
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+        http2=True,
+    )
+
+
+@app.on_event("shutdown")
+async def _close_http_client():
+    client = getattr(app.state, "http_client", None)
+    if client is not None:
+        await client.aclose()
+
+# Login rate limit: a token bucket per client IP, ip -> (tokens, last_refill).
+# Holds up to _LOGIN_MAX_PER_WINDOW tokens and refills at the same rate per window.
+# Least recently used IPs are evicted past _LOGIN_MAX_TRACKED_IPS to bound memory.
+_login_attempts: OrderedDict[str, tuple[float, float]] = OrderedDict()
 _RATE_LIMIT_WINDOW_S = 60.0
 _LOGIN_MAX_PER_WINDOW = int(os.environ.get("LOGIN_MAX_PER_MIN", "12"))
+_LOGIN_REFILL_PER_S = _LOGIN_MAX_PER_WINDOW / _RATE_LIMIT_WINDOW_S
+# Each entry is a few hundred bytes at most, so the default caps the table at roughly 10 MB.
+_LOGIN_MAX_TRACKED_IPS = int(os.environ.get("LOGIN_MAX_TRACKED_IPS", "50000"))
+_LOGIN_SWEEP_INTERVAL_S = 60.0
+
+
+async def _sweep_login_attempts():
+    # A bucket untouched for a full window has refilled completely, so it's
+    # equivalent to no entry at all. Entries are in least-recently-used order,
+    # so stop at the first one that's still fresh.
+    while True:
+        await asyncio.sleep(_LOGIN_SWEEP_INTERVAL_S)
+        now = time.monotonic()
+        while _login_attempts:
+            ip, (_, last) = next(iter(_login_attempts.items()))
+            if now - last <= _RATE_LIMIT_WINDOW_S:
+                break
+            _login_attempts.pop(ip, None)
+
+
+@app.on_event("startup")
+async def _start_login_sweeper():
+    if APP_PASSKEY:
+        app.state.login_sweeper = asyncio.create_task(_sweep_login_attempts())
+
+
+@app.on_event("shutdown")
+async def _stop_login_sweeper():
+    task = getattr(app.state, "login_sweeper", None)
+    if task is not None:
+        task.cancel()
 
 
 def _client_ip(request: Request) -> str:
@@ -73,49 +333,35 @@ def _is_authed(request: Request) -> bool:
         return False
 
 
-def _require_auth_or_401(request: Request) -> Response | None:
-    if _is_authed(request):
-        return None
-    return Response(
-        content=json.dumps({"error": "unauthorized"}),
-        status_code=401,
-        media_type="application/json",
+async def _forward_upstream(method: str, url: str, headers: list, body: bytes) -> Response:
+    client = app.state.http_client
+    upstream_req = client.build_request(method, url, headers=headers, content=body)
+    # Send in streaming mode: the shared client outlives this handler, so the
+    # response can be drained after we return and closed once it's done.
+    upstream_resp = await client.send(upstream_req, stream=True)
+
+    # Stream every body straight through (SSE and regular responses alike)
+    # instead of buffering it in memory first.
+    resp_headers = filter_hop_by_hop_headers(dict(upstream_resp.headers))
+    content_type = upstream_resp.headers.get("content-type", "")
+    if content_type.startswith("text/event-stream"):
+        # Ask reverse proxies in front of us (nginx, etc.) not to buffer events.
+        resp_headers["x-accel-buffering"] = "no"
+        resp_headers.setdefault("cache-control", "no-cache")
+    # aiter_raw() without a chunk size yields bytes as they arrive (a chunk size
+    # would hold events back until it fills), and StreamingResponse awaits send()
+    # per chunk. Every middleware in the stack is pure ASGI, so nothing re-buffers.
+    return StreamingResponse(
+        upstream_resp.aiter_raw(),
+        status_code=upstream_resp.status_code,
+        headers=resp_headers,
+        media_type=content_type or None,
+        background=BackgroundTask(upstream_resp.aclose),
     )
 
 
-def _require_auth_or_redirect(request: Request) -> Response | None:
-    if _is_authed(request):
-        return None
-    return RedirectResponse(url="/login", status_code=302)
-
-def _filter_hop_by_hop_headers(headers: dict) -> dict:
-    # https://www.rfc-editor.org/rfc/rfc2616#section-13.5.1
-    hop_by_hop = {
-        "connection",
-        "keep-alive",
-        "proxy-authenticate",
-        "proxy-authorization",
-        "te",
-        "trailers",
-        "transfer-encoding",
-        "upgrade",
-        "host",
-        "content-length",
-    }
-    return {k: v for k, v in headers.items() if k.lower() not in hop_by_hop}
-
-
-@app.get("/login", response_class=HTMLResponse)
-async def login_page(request: Request):
-    if not APP_PASSKEY:
-        return HTMLResponse(
-            "<h3>APP_PASSKEY is not set</h3><p>Set APP_PASSKEY to enable login protection.</p>",
-            status_code=500,
-        )
-    if _is_authed(request):
-        return RedirectResponse(url="/", status_code=302)
-    return HTMLResponse(
-        """
+# Encoded once at import rather than stripped and re-encoded per request.
+_LOGIN_HTML = """
 <!doctype html>
 <html>
   <head>
@@ -161,39 +407,53 @@ async def login_page(request: Request):
     </script>
   </body>
 </html>
-        """.strip(),
-        status_code=200,
-    )
+""".strip().encode("utf-8")
+
+
+@app.get("/login", response_class=HTMLResponse)
+async def login_page(request: Request):
+    if not APP_PASSKEY:
+        return HTMLResponse(
+            "<h3>APP_PASSKEY is not set</h3><p>Set APP_PASSKEY to enable login protection.</p>",
+            status_code=500,
+        )
+    if _is_authed(request):
+        return RedirectResponse(url="/", status_code=302)
+    return HTMLResponse(_LOGIN_HTML, status_code=200)
 
 
 @app.post("/auth/login")
 async def login_api(request: Request):
     if not APP_PASSKEY:
         return Response(
-            content=json.dumps({"error": "APP_PASSKEY is not set"}),
+            content=_NO_PASSKEY_JSON,
             status_code=500,
             media_type="application/json",
         )
 
     ip = _client_ip(request)
-    now = time.time()
-    attempts = _login_attempts.get(ip, [])
-    attempts = [t for t in attempts if (now - t) <= _RATE_LIMIT_WINDOW_S]
-    if len(attempts) >= _LOGIN_MAX_PER_WINDOW:
-        _login_attempts[ip] = attempts
+    now = time.monotonic()
+    tokens, last = _login_attempts.pop(ip, (_LOGIN_MAX_PER_WINDOW, now))
+    tokens = min(_LOGIN_MAX_PER_WINDOW, tokens + (now - last) * _LOGIN_REFILL_PER_S)
+    allowed = tokens >= 1
+    if allowed:
+        tokens -= 1
+    # Re-inserting moves the IP to the most recently used end.
+    _login_attempts[ip] = (tokens, now)
+    while len(_login_attempts) > _LOGIN_MAX_TRACKED_IPS:
+        _login_attempts.popitem(last=False)
+    if not allowed:
         return Response(
-            content=json.dumps({"error": "too many attempts, try again later"}),
+            content=_TOO_MANY_JSON,
             status_code=429,
             media_type="application/json",
         )
-    attempts.append(now)
-    _login_attempts[ip] = attempts
 
     data = await request.json()
     passkey = (data.get("passkey") or "").strip()
     if not secrets.compare_digest(passkey, APP_PASSKEY):
         return Response(
-            content=json.dumps({"error": "invalid passkey"}),
+            content=_BAD_PASSKEY_JSON,
             status_code=401,
             media_type="application/json",
         )
@@ -213,12 +473,8 @@ async def logout_api(request: Request):
 
 @app.get("/")
 async def root(request: Request):
-    guard = _require_auth_or_redirect(request)
-    if guard:
-        return guard
-    index = STATIC_DIR / "index.html"
-    if index.exists():
-        return FileResponse(index)
+    if _INDEX_PATH:
+        return FileResponse(_INDEX_PATH)
     return HTMLResponse(
         "<h3>dist/ not found</h3><p>Run <code>npm run build</code> so this server can serve the SPA.</p>",
         status_code=500,
@@ -228,47 +484,19 @@ async def root(request: Request):
 if MODE == "proxy":
     @app.api_route("/v1/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
     async def proxy_openai_v1(path: str, request: Request):
-        guard = _require_auth_or_401(request)
-        if guard:
-            return guard
-
         upstream_url = f"{UPSTREAM_BASE}/v1/{path.lstrip('/')}"
         if request.url.query:
             upstream_url += f"?{request.url.query}"
 
-        import httpx
-
         body = await request.body()
-        headers = _filter_hop_by_hop_headers(dict(request.headers))
-
         # Ensure upstream auth is server-controlled if configured.
         if OPENAI_API_KEY:
-            headers["authorization"] = f"Bearer {OPENAI_API_KEY}"
-
-        async with httpx.AsyncClient(follow_redirects=True, timeout=60.0) as client:
-            upstream_resp = await client.request(
-                request.method,
-                upstream_url,
-                headers=headers,
-                content=body,
-            )
-
-            resp_headers = _filter_hop_by_hop_headers(dict(upstream_resp.headers))
-            content_type = upstream_resp.headers.get("content-type", "")
-            if content_type.startswith("text/event-stream"):
-                return StreamingResponse(
-                    upstream_resp.aiter_raw(),
-                    status_code=upstream_resp.status_code,
-                    headers=resp_headers,
-                    media_type=content_type,
-                )
-
-            return Response(
-                content=upstream_resp.content,
-                status_code=upstream_resp.status_code,
-                headers=resp_headers,
-                media_type=content_type or None,
-            )
+            headers = forwardable_headers(request.scope["headers"], HOP_BY_HOP_RAW_AND_AUTH)
+            headers.append((b"authorization", f"Bearer {OPENAI_API_KEY}".encode("latin-1")))
+        else:
+            headers = forwardable_headers(request.scope["headers"])
+
+        return await _forward_upstream(request.method, upstream_url, headers, body)
 
 
 @app.api_route("/proxy/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
@@ -281,13 +509,9 @@ async def proxy(path: str, request: Request):
     Then call from the SPA:
       API BASE URI = http://<this-host>:5174/proxy
     """
-    guard = _require_auth_or_401(request)
-    if guard:
-        return guard
-
     if not MOCK_UPSTREAM_BASE:
         return Response(
-            content=json.dumps({"error": "MOCK_API_UPSTREAM is not set"}),
+            content=_NO_UPSTREAM_JSON,
             status_code=500,
             media_type="application/json",
         )
@@ -296,36 +520,10 @@ async def proxy(path: str, request: Request):
     if request.url.query:
         upstream_url += f"?{request.url.query}"
 
-    # Import here so the app still runs if proxy isn't used.
-    import httpx
-
     body = await request.body()
-    headers = _filter_hop_by_hop_headers(dict(request.headers))
-
-    async with httpx.AsyncClient(follow_redirects=True, timeout=60.0) as client:
-        upstream_resp = await client.request(
-            request.method,
-            upstream_url,
-            headers=headers,
-            content=body,
-        )
+    headers = forwardable_headers(request.scope["headers"])
 
-        resp_headers = _filter_hop_by_hop_headers(dict(upstream_resp.headers))
-        content_type = upstream_resp.headers.get("content-type", "")
-        if content_type.startswith("text/event-stream"):
-            return StreamingResponse(
-                upstream_resp.aiter_raw(),
-                status_code=upstream_resp.status_code,
-                headers=resp_headers,
-                media_type=content_type,
-            )
-
-        return Response(
-            content=upstream_resp.content,
-            status_code=upstream_resp.status_code,
-            headers=resp_headers,
-            media_type=content_type or None,
-        )
+    return await _forward_upstream(request.method, upstream_url, headers, body)
 
 
 # Define a route to handle POST requests
@@ -336,26 +534,19 @@ async def post_data(data: dict):
     messages = data['messages']
     instructions = messages[-1]['content']
 
-    delay = 0
-    lines = None
     answer = 'Default mock answer from mocked API'
-
-    try:
-        delay = re.findall(r'(?<=d)\d+',instructions)[0]
-    except:
-        pass
-
-    try:
-        lines = re.findall(r'(?<=l)\d+',instructions)[0]
-    except:
-        pass
+    if not isinstance(instructions, str):
+        # e.g. multi-part content: no directives to parse
+        instructions = ''
+    delay = m.group(0) if (m := _RE_DELAY.search(instructions)) else None
+    lines = m.group(0) if (m := _RE_LINES.search(instructions)) else None
 
 
     if delay:
-        time.sleep(int(delay))
+        await asyncio.sleep(int(delay))
 
     if lines:
-        answer = "\n".join([lorem.sentence() for _ in range(int(lines))])
+        answer = await _lorem_answer(int(lines))
 
     response = {
         "id": 0,
@@ -390,25 +581,18 @@ async def post_responses(data: dict):
         messages = data.get('messages') or []
         instructions = (messages[-1] or {}).get('content') if messages else ''
 
-    delay = 0
-    lines = None
     answer = 'Default mock answer from mocked API'
-
-    try:
-        delay = re.findall(r'(?<=d)\\d+', instructions)[0]
-    except:
-        pass
-
-    try:
-        lines = re.findall(r'(?<=l)\\d+', instructions)[0]
-    except:
-        pass
+    if not isinstance(instructions, str):
+        # e.g. multi-part content: no directives to parse
+        instructions = ''
+    delay = m.group(0) if (m := _RE_DELAY.search(instructions)) else None
+    lines = m.group(0) if (m := _RE_LINES.search(instructions)) else None
 
     if delay:
-        time.sleep(int(delay))
+        await asyncio.sleep(int(delay))
 
     if lines:
-        answer = "\\n".join([lorem.sentence() for _ in range(int(lines))])
+        answer = await _lorem_answer(int(lines))
 
     response = {
         "id": 0,
@@ -430,10 +614,7 @@ async def post_responses(data: dict):
 @app.get('/v1/models')
 async def list_models():
     """Returns a list of models to get app to work."""
-    with open('/work/models_response.json') as f:
-        result = json.load(f)
-
-    return result
+    return Response(content=_MODELS_BODY, media_type="application/json")
 
 
 @app.post('/')
@@ -459,15 +640,14 @@ async def spa_fallback(path: str, request: Request):
     ):
         return Response(status_code=404)
 
-    guard = _require_auth_or_redirect(request)
-    if guard:
-        return guard
-
-    candidate = (STATIC_DIR / path).resolve()
-    if STATIC_DIR in candidate.parents and candidate.is_file():
-        return FileResponse(candidate)
+    static_file = _STATIC_FILES.get(path)
+    if static_file:
+        return FileResponse(static_file)
+    if path.startswith("assets/"):
+        # A missing bundle is a 404, not the SPA shell (assets/ may be public,
+        # see PUBLIC_ASSETS, while index.html stays behind the login).
+        return Response(status_code=404)
 
-    index = STATIC_DIR / "index.html"
-    if index.exists():
-        return FileResponse(index)
+    if _INDEX_PATH:
+        return FileResponse(_INDEX_PATH)
     return Response(status_code=404)